@@ -0,0 +1,61 @@
+import argparse
+import json
+import time
+import logging
+
+from main import load_env
+from controller.generator import Generator
+from controller.log import setup_logging
+
+setup_logging("app.log")
+logger = logging.getLogger(__name__)
+
+
+def read_questions(path: str) -> list:
+    """Read one question per line, skipping blank lines and '#' comments"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def result_writer(f):
+    """Return a callback that writes each finished row immediately, so an interrupted run keeps its progress"""
+    def write(result: dict):
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        f.flush()
+    return write
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Answer a file of questions in batch")
+    parser.add_argument("input", help="Text file with one question per line")
+    parser.add_argument("-o", "--output", default="answers.jsonl", help="JSONL output path")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent LLM workers")
+    parser.add_argument("--rpm", type=int, default=300,
+                        help="LLM requests per minute; each question uses at least 3 requests")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    try:
+        args = parse_args()
+        env = load_env()
+        generator = Generator(env)
+
+        questions = read_questions(args.input)
+        start = time.perf_counter()
+        with open(args.output, "w", encoding="utf-8") as f:
+            results = generator.get_answers(
+                questions,
+                max_workers=args.workers,
+                requests_per_minute=args.rpm,
+                on_result=result_writer(f)
+            )
+        elapsed = time.perf_counter() - start
+
+        logger.info(
+            f"Answered {len(results)} unique questions ({len(questions)} read) in {elapsed:.1f}s "
+            f"({len(results) / elapsed if elapsed else 0:.2f} q/s) -> {args.output}"
+        )
+    except Exception as e:
+        logger.critical(f"Batch run failed: {str(e)}")
+        exit(1)
@@ -6,8 +6,36 @@ from interface.model.prompt import Prompt
 from interface.db.elastic import Elastic
 from langchain_openai import OpenAIEmbeddings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from concurrent.futures import ThreadPoolExecutor
+from .log import generate_trace_id, new_trace_id
+import logging
+import threading
 import time
 
+logger = logging.getLogger(__name__)
+
+# ChatGPT/Gemini 래퍼는 예외 대신 이 접두어로 시작하는 문자열을 반환함
+LLM_ERROR_PREFIX = "Error communicating with "
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces LLM requests to at most `requests_per_minute`"""
+
+    def __init__(self, requests_per_minute: int = 300):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
 class Generator:
     """Main generator class for handling RAG-based question answering"""
 
@@ -16,7 +44,6 @@ class Generator:
         self.embedding_model = self._get_embedding_model()
         self.elastic = self._initialize_elastic(self.embedding_model)
         self.llm = self._initialize_llm()
-        self.prompt_generator = Prompt(user_question="")
 
         # LLM 요청당 최대 토큰 제한 설정 (예: 4000 tokens)
         self.max_token_limit = 4000
@@ -37,9 +64,27 @@ class Generator:
             username=self.env["ELASTIC_USER"],
             password=self.env["ELASTIC_PASSWORD"],
             embedding_model=embedding_model,
-            index_name="aitrics"
+            index_name="aitrics",
+            indices=self._parse_indices(self.env.get("ELASTIC_INDICES", "")),
+            search_timeout=float(self.env.get("ELASTIC_SEARCH_TIMEOUT") or 5.0)
         )
 
+    @staticmethod
+    def _parse_indices(spec: str) -> List[dict]:
+        """
+        Parse ELASTIC_INDICES, e.g. "confluence:10:1.0,jira:5:0.8,slack".
+        Each entry is name[:k[:weight]]; an empty spec falls back to the default index.
+        """
+        indices = []
+        for entry in filter(None, (part.strip() for part in spec.split(","))):
+            name, *rest = entry.split(":")
+            indices.append({
+                "name": name,
+                "k": int(rest[0]) if len(rest) > 0 and rest[0] else None,
+                "weight": float(rest[1]) if len(rest) > 1 and rest[1] else 1.0,
+            })
+        return indices or None
+
     def _initialize_llm(self):
         """Initialize the appropriate LLM based on configuration"""
         if self.env["LLM"] == "CHATGPT":
@@ -50,15 +95,38 @@ class Generator:
 
     def _prepare_prompt(self, question: str, context_documents: List[Document]) -> str:
         """Prepare prompt with question and context"""
-        self.prompt_generator = Prompt(user_question=question)
+        # 배치 모드에서 여러 스레드가 동시에 호출하므로 인스턴스 상태를 공유하지 않음
+        prompt_generator = Prompt(user_question=question)
         for doc in context_documents:
-            self.prompt_generator.add_document(doc.page_content, doc.metadata)
-        return self.prompt_generator.generate_prompt_rag()
+            prompt_generator.add_document(doc.page_content, doc.metadata)
+        prompt = prompt_generator.generate_prompt_rag()
+        self._log_token_split("rag", prompt_generator)
+        return prompt
 
     def _refine_question(self, question: str) -> str:
         """Prepare prompt with refined question"""
-        self.prompt_generator = Prompt(user_question=question)
-        return self.prompt_generator.generate_prompt_question()
+        prompt_generator = Prompt(user_question=question)
+        prompt = prompt_generator.generate_prompt_question()
+        self._log_token_split("question", prompt_generator)
+        return prompt
+
+    def _final_prompt(self, question: str, partial_answers: List[str]) -> str:
+        """Prepare prompt that merges the per-chunk answers"""
+        prompt_generator = Prompt(user_question=question)
+        prompt = prompt_generator.generate_prompt_final(partial_answers)
+        self._log_token_split("final", prompt_generator)
+        return prompt
+
+    def _log_token_split(self, kind: str, prompt_generator: Prompt):
+        """Record how much of the prompt is the static prefix and whether it can be cached"""
+        # static 토큰 수는 템플릿별로 한 번만 계산되고, 요청마다 dynamic 부분만 토큰화
+        split = prompt_generator.token_split()
+        logger.info("Prepared prompt.", extra={
+            "prompt": kind,
+            "static_tokens": split["static"],
+            "dynamic_tokens": split["dynamic"],
+            "cache_eligible": split["prefix_cacheable"] and getattr(self.llm, "supports_prompt_caching", False),
+        })
 
     def _split_documents(self, documents: List[Document], max_tokens: int = 2000) -> List[List[Document]]:
         """문서들을 토큰 제한을 고려하여 나누는 함수"""
@@ -83,36 +151,156 @@ class Generator:
 
         return chunks
 
+    def _answer_from_documents(self, question: str, context_documents: List[Document],
+                               send_request=None, wait=lambda: time.sleep(2)) -> str:
+        """검색된 문서를 청크 단위로 LLM에 전달하고 부분 응답을 종합"""
+        send_request = send_request or self.llm.send_request
+
+        # 문서를 LLM의 입력 제한을 고려하여 나누기
+        document_chunks = self._split_documents(context_documents, max_tokens=self.max_token_limit // 2)
+
+        # 각 문서 청크에 대해 개별적으로 LLM 호출
+        partial_answers = []
+        for chunk in document_chunks:
+            prompt = self._prepare_prompt(question, chunk)
+            partial_answer = send_request(prompt)
+            partial_answers.append(partial_answer)
+            wait()
+
+        # 최종적인 응답을 생성하기 위해 LLM에 통합 요청
+        final_prompt = self._final_prompt(question, partial_answers)
+        return send_request(final_prompt)
+
     def get_answer(self, question: str) -> str:
         """Generate an answer using RAG with chunking"""
         try:
             # 질문 다듬기
+            start = time.perf_counter()
             question_refined = self._refine_question(question)
             question_refined = self.llm.send_request(question_refined)
+            logger.info("Refined question.", extra={"duration_ms": round((time.perf_counter() - start) * 1000, 1)})
 
             # 유사 문서 검색
+            start = time.perf_counter()
             context_documents = self.elastic.similarity_search(question_refined, k=10)
+            logger.info("Retrieved documents.", extra={
+                "documents": len(context_documents),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
 
-            # 문서를 LLM의 입력 제한을 고려하여 나누기
-            document_chunks = self._split_documents(context_documents, max_tokens=self.max_token_limit // 2)
+            start = time.perf_counter()
+            answer = self._answer_from_documents(question, context_documents)
+            logger.info("Generated answer.", extra={"duration_ms": round((time.perf_counter() - start) * 1000, 1)})
+            return answer
 
-            # 각 문서 청크에 대해 개별적으로 LLM 호출
-            partial_answers = []
-            for chunk in document_chunks:
-                prompt = self._prepare_prompt(question, chunk)
-                partial_answer = self.llm.send_request(prompt)
-                partial_answers.append(partial_answer)
-                time.sleep(2)
+        except Exception as e:
+            logger.exception("Error generating answer.")
+            return f"Error generating answer: {str(e)}"
 
-            # 최종적인 응답을 생성하기 위해 LLM에 통합 요청
-            final_prompt = f"다음은 {question}에 대하여 개별적으로 생성된 응답들입니다:\n\n" + "\n\n".join(partial_answers) + "\n\n이 정보를 종합하고 질문과 메타데이터를 다시 명확하게 판단하여 최종 답변을 생성해 주세요. 링크를 포함해야 합니다."
-            final_answer = self.llm.send_request(final_prompt)
+    def get_answers(self, questions: List[str], max_workers: int = 4,
+                    requests_per_minute: int = 300, on_result=None) -> List[dict]:
+        """
+        Answer many questions at once.
+        Duplicates are dropped, retrieval is batched (one embed_documents + chunked msearch),
+        and the LLM stages run concurrently under a shared rate limit.
+        Each question needs at least three LLM calls (refine, one per document chunk, final merge),
+        so throughput is capped at roughly requests_per_minute / 3 questions per minute.
+        Returns one dict per unique question with the answer and per-stage timings (seconds);
+        `on_result(row)` is called (serialized) as soon as each row is complete.
+        """
+        unique_questions = list(dict.fromkeys(q.strip() for q in questions if q and q.strip()))
+        if not unique_questions:
+            return []
 
-            return final_answer
+        limiter = RateLimiter(requests_per_minute)
+        # 질문마다 trace id를 부여하고, 작업 스레드에서 다시 바인딩하여 로그와 결과를 연결
+        results = [
+            {"question": q, "trace_id": generate_trace_id(), "answer": None, "error": None, "timings": {}}
+            for q in unique_questions
+        ]
 
-        except Exception as e:
-            return f"Error generating answer: {str(e)}"
+        result_lock = threading.Lock()
+
+        def llm_request(prompt: str) -> str:
+            limiter.wait()
+            response = self.llm.send_request(prompt)
+            if response.startswith(LLM_ERROR_PREFIX):
+                raise RuntimeError(response)
+            return response
+
+        def finish(i: int):
+            results[i]["timings"]["total"] = sum(results[i]["timings"].values())
+            if on_result is not None:
+                with result_lock:
+                    on_result(results[i])
+
+        def record_error(i: int, message: str):
+            # 한 질문에서 여러 단계가 실패할 수 있으므로 오류를 이어 붙임
+            error = results[i]["error"]
+            results[i]["error"] = f"{error}; {message}" if error else message
+
+        def refine(i: int) -> str:
+            new_trace_id(results[i]["trace_id"])
+            start = time.perf_counter()
+            try:
+                return llm_request(self._refine_question(unique_questions[i]))
+            except Exception as e:
+                # 정제 실패는 기록하고 원래 질문으로 검색
+                logger.warning(f"Question refinement failed: {str(e)}")
+                record_error(i, f"Question refinement failed: {str(e)}")
+                return unique_questions[i]
+            finally:
+                results[i]["timings"]["refine"] = time.perf_counter() - start
+
+        def answer(i: int, context_documents: List[Document]):
+            new_trace_id(results[i]["trace_id"])
+            start = time.perf_counter()
+            if context_documents is None:
+                # 이 질문이 포함된 검색 묶음이 모든 인덱스에서 실패함
+                record_error(i, "Document retrieval failed")
+                results[i]["answer"] = "Error generating answer: Document retrieval failed"
+                results[i]["timings"]["generation"] = 0.0
+                finish(i)
+                return
+            try:
+                # 요청 간격은 RateLimiter가 관리하므로 청크 사이 대기는 생략
+                results[i]["answer"] = self._answer_from_documents(
+                    unique_questions[i], context_documents, send_request=llm_request, wait=lambda: None
+                )
+            except Exception as e:
+                logger.exception("Error generating answer.")
+                record_error(i, str(e))
+                results[i]["answer"] = f"Error generating answer: {str(e)}"
+            finally:
+                results[i]["timings"]["generation"] = time.perf_counter() - start
+                finish(i)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # 질문 다듬기 (동시 실행)
+            refined_questions = list(executor.map(refine, range(len(unique_questions))))
+
+            # 유사 문서 검색 (일괄 처리, 소요 시간은 질문 수로 나누어 기록)
+            start = time.perf_counter()
+            try:
+                documents_per_question = self.elastic.hybrid_search_batch(refined_questions, k=10)
+            except Exception as e:
+                documents_per_question = None
+                for i, result in enumerate(results):
+                    record_error(i, str(e))
+                    result["answer"] = f"Error generating answer: {str(e)}"
+            retrieval_share = (time.perf_counter() - start) / len(unique_questions)
+            for result in results:
+                result["timings"]["retrieval"] = retrieval_share
+
+            # 답변 생성 (동시 실행). 검색 실패 시에는 생략하고 generation 시간은 0으로 기록
+            if documents_per_question is not None:
+                list(executor.map(answer, range(len(unique_questions)), documents_per_question))
+            else:
+                for i, result in enumerate(results):
+                    result["timings"]["generation"] = 0.0
+                    finish(i)
 
+        return results
 
     def get_streaming_answer(self, question: str) -> TypeGenerator[str, None, None]:
         """Generate a streaming answer using RAG"""
@@ -10,18 +10,17 @@ import os
 import requests
 from typing import Optional
 from .generator import Generator
+from .log import setup_logging, new_trace_id
 
-import sys
 import logging
 
+# 로깅 설정 (큐 + 백그라운드 스레드로 기록). uvicorn reload 프로세스는 main.py를 거치지 않고
+# 이 모듈을 직접 import 하므로 여기서도 호출 (중복 호출은 무시됨)
+setup_logging("app.log")
 logger = logging.getLogger("uvicorn")
-logger.setLevel(logging.INFO)
 
-# 로그 파일 설정
-file_handler = logging.FileHandler("app.log")
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
+# 요청마다 발생하는 접근 로그는 일부만 기록
+ACCESS_LOG_SAMPLE_RATE = 0.1
 
 
 class SlackBot:
@@ -34,7 +33,7 @@ class SlackBot:
         try:
             # 타임스탬프 검증 (너무 오래된 요청 차단)
             if abs(time.time() - int(timestamp)) > 60 * 5:
-                print("⚠️ Request timestamp too old. Ignoring request.")
+                logger.warning("Request timestamp too old. Ignoring request.", extra={"slack_timestamp": timestamp})
                 return False
 
             sig_basestring = f"v0:{timestamp}:{body.decode('utf-8')}"
@@ -45,13 +44,13 @@ class SlackBot:
             ).hexdigest()
 
             if not hmac.compare_digest(my_signature, signature):
-                print(f"⚠️ Signature mismatch! Expected: {my_signature}, Received: {signature}")
+                logger.warning("Slack signature mismatch.")
                 return False
 
-            print("✅ Signature verified successfully.")
+            logger.debug("Signature verified successfully.")
             return True
         except Exception as e:
-            print(f"❌ Error verifying request: {str(e)}")
+            logger.error(f"Error verifying request: {str(e)}")
             return False
 
     async def send_message(self, channel_id: str, message: str, thread_ts: Optional[str] = None):
@@ -71,9 +70,10 @@ class SlackBot:
         try:
             response = requests.post(url, headers=headers, json=payload)
             response.raise_for_status()
+            logger.info("Posted message to Slack.", extra={"channel": channel_id, "thread_ts": thread_ts})
             return response.json()
         except Exception as e:
-            print(f"Failed to send message: {str(e)}")
+            logger.error(f"Failed to send message: {str(e)}", extra={"channel": channel_id})
             return None
 
     async def handle_message(self, event: dict):
@@ -85,12 +85,14 @@ class SlackBot:
         channel_id = event["channel"]
         thread_ts = event.get("thread_ts", event.get("ts"))
         question = event["text"]
+        logger.info("Handling Slack message.", extra={"channel": channel_id, "thread_ts": thread_ts})
 
         # Get answer using Generator
         try:
             answer = self.generator.get_answer(question)
             await self.send_message(channel_id, answer, thread_ts)
         except Exception as e:
+            logger.exception("Error processing Slack message.")
             error_msg = f"Error processing your request: {str(e)}"
             await self.send_message(channel_id, error_msg, thread_ts)
 
@@ -126,16 +128,16 @@ async def slack_events(request: Request):
     signature = request.headers.get("X-Slack-Signature")
     retry_num = request.headers.get("X-Slack-Retry-Num", "0")
 
-    print(f"🔄 Received Slack request. Retry Num: {retry_num}")
+    logger.info("Received Slack request.", extra={"retry_num": retry_num, "event_id": data.get("event_id")})
 
     # 요청 검증
     if not slack_bot.verify_request(timestamp, signature, body):
-        print("❌ Invalid request. Ignoring...")
+        logger.warning("Invalid Slack request. Ignoring.")
         raise HTTPException(status_code=403, detail="Invalid request")
 
     # Slack의 재시도 요청 방지 (첫 번째 요청만 처리)
     if retry_num != "0":
-        print("🔄 Slack retry request detected. Ignoring...")
+        logger.info("Slack retry request detected. Ignoring.", extra={"retry_num": retry_num})
         return JSONResponse(content={"status": "ignored"}, status_code=200)
 
     # 이벤트 비동기 처리
@@ -161,7 +163,19 @@ async def root_post(request: Request):
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    print(f"📩 Incoming request: {request.method} {request.url}")
+    # 요청 단위 trace id 설정 (이후 생성되는 task와 로그에 전달됨)
+    trace_id = new_trace_id(request.headers.get("X-Request-ID"))
+    start = time.perf_counter()
     response = await call_next(request)
-    print(f"📤 Response status: {response.status_code}")
+    logger.info(
+        "Handled request.",
+        extra={
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "sample_rate": ACCESS_LOG_SAMPLE_RATE,
+        }
+    )
+    response.headers["X-Request-ID"] = trace_id
     return response
\ No newline at end of file
@@ -0,0 +1,134 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+# 요청 단위 추적 ID. asyncio task 생성 시 context가 복사되므로
+# /slack/events 에서 설정한 값이 Generator, Elastic, Slack 전송까지 그대로 전달된다.
+trace_id_var: ContextVar[str] = ContextVar("trace_id", default="-")
+
+# LogRecord 기본 속성 (JSON 출력 시 extra 필드와 구분하기 위함)
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample_rate"}
+
+_listener = None
+
+
+def generate_trace_id() -> str:
+    """Return a fresh short trace id"""
+    return uuid.uuid4().hex[:16]
+
+
+def new_trace_id(trace_id: str = None) -> str:
+    """Bind a trace id (or a fresh one) to the current context and return it"""
+    trace_id = trace_id or generate_trace_id()
+    trace_id_var.set(trace_id)
+    return trace_id
+
+
+class TraceIdFilter(logging.Filter):
+    """Attach the current trace id to each record (runs in the caller's context)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of high-volume records.
+    A record opts in with `extra={"sample_rate": 0.1}`; WARNING and above are never dropped.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", 1.0)
+        if rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        return random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as a single JSON line, including any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key not in payload:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class RawQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues the record without formatting it.
+    Only the message arguments are merged in the caller; tracebacks and
+    JSON/console formatting are left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(log_file: str = "app.log", level: int = logging.INFO,
+                  logger_names=("uvicorn", "uvicorn.access")):
+    """
+    Route logging through a queue so the event loop only pays for an enqueue.
+    A background QueueListener thread writes JSON lines to `log_file` and a
+    plain-text copy to stderr. Handlers already attached to `logger_names`
+    (uvicorn's console handlers) are removed so nothing writes synchronously.
+    Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.SimpleQueue()
+
+    queue_handler = RawQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+    queue_handler.addFilter(TraceIdFilter())
+
+    file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setFormatter(logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s"
+    ))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    # uvicorn 로거의 기존 핸들러는 이벤트 루프에서 직접 출력하므로 제거하고 큐로만 기록
+    for name in logger_names:
+        named_logger = logging.getLogger(name)
+        named_logger.setLevel(level)
+        for handler in list(named_logger.handlers):
+            named_logger.removeHandler(handler)
+        named_logger.addHandler(queue_handler)
+        named_logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
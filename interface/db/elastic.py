@@ -1,24 +1,40 @@
 from langchain_community.vectorstores import ElasticsearchStore
 from elasticsearch import Elasticsearch
 from langchain.schema import Document
+from concurrent.futures import ThreadPoolExecutor, wait
+import contextvars
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 class Elastic:
-    def __init__(self, host, port, embedding_model=None, username=None, password=None, index_name="default"):
+    def __init__(self, host, port, embedding_model=None, username=None, password=None, index_name="default",
+                 indices=None, search_timeout=5.0, batch_size=10):
         """
         Elastic 클래스 초기화.
         :param host: Elasticsearch 호스트 URL
         :param username: Elasticsearch 사용자 이름 (필요 시)
         :param password: Elasticsearch 비밀번호 (필요 시)
         :param index_name: 사용할 Elasticsearch 인덱스 이름
+        :param indices: 동시에 검색할 인덱스 설정 리스트 [{"name": ..., "k": ..., "weight": ...}]
+                        (없으면 index_name 하나만 검색, k 생략 시 검색 요청의 k 사용)
+        :param search_timeout: 질의 하나에 대한 인덱스별 검색 제한 시간(초). 초과한 인덱스는 결과에서 제외
+        :param batch_size: 일괄 검색 시 msearch 한 번에 담을 질의 수
         """
         self.index_name = index_name
+        self.indices = indices or [{"name": index_name}]
+        for index in self.indices:
+            index.setdefault("k", None)
+            index.setdefault("weight", 1.0)
+        self.search_timeout = search_timeout
+        self.batch_size = batch_size
         self.es_client = Elasticsearch(
             hosts=[f"{host}"],
             http_auth=(username, password) if username and password else None
         )
+        # 인덱스별 검색을 병렬로 실행하기 위한 스레드 풀 (느린 인덱스를 기다리지 않도록 호출 간 공유)
+        self.executor = ThreadPoolExecutor(max_workers=max(4, 2 * len(self.indices)))
 
         if embedding_model is None:
             raise ValueError("An embedding model must be provided.")
@@ -33,7 +49,10 @@ class Elastic:
             )
         )
 
-        print(f"Connected to Elasticsearch at {host}, using index: {index_name}")#log로 바꾸기
+        logger.info(
+            f"Connected to Elasticsearch at {host}, using indices: "
+            f"{', '.join(index['name'] for index in self.indices)}"
+        )
 
     def remove_duplicate_documents(self,documents):
         """ 리스트에서 중복된 Document 객체를 제거하는 함수 """
@@ -61,92 +80,218 @@ class Elastic:
                 "source": _source.get("metadata", {}).get("source", ""),
                 "section": _source.get("metadata", {}).get("section", ""),
                 "url": _source.get("metadata", {}).get("url", ""),
+                "index": hit.get("_index", ""),
                 "score": hit.get("_score", 0)  # 검색 점수 추가
             }
         )
 
-    def hybrid_search(self, query, k=10, vector_weight=0.5):
-        try:
-            # 벡터 검색 수행
-            vector_query = self.embedding_model.embed_query(query)
-            vector_response = self.es_client.search(
-                index=self.index_name,
-                body={
-                    "size": k,
-                    "_source": ["vector", "metadata.title", "text", "metadata"],
-                    "query": {
-                        "script_score": {
-                            "query": {"match_all": {}},
-                            "script": {
-                                "source": "cosineSimilarity(params.query_vector, 'vector') + 1.0",
-                                "params": {"query_vector": vector_query}
-                            }
-                        }
+    def _vector_query_body(self, query_vector, k):
+        """ 벡터(cosine) 검색 요청 본문 생성 """
+        return {
+            "size": k,
+            "_source": ["vector", "metadata.title", "text", "metadata"],
+            "query": {
+                "script_score": {
+                    "query": {"match_all": {}},
+                    "script": {
+                        "source": "cosineSimilarity(params.query_vector, 'vector') + 1.0",
+                        "params": {"query_vector": query_vector}
                     }
                 }
-            )
+            }
+        }
 
-            # 키워드 검색 수행
-            keyword_response = self.es_client.search(index=self.index_name, body={
-                "size": k,
-                "_source": ["text", "metadata"],
-                "query": {
-                    "multi_match": {
-                        "query": query,
-                        "fields": ["text^3", "metadata.title"],
-                        "type": "best_fields"
-                    }
+    def _keyword_query_body(self, query, k):
+        """ 키워드(multi_match) 검색 요청 본문 생성 """
+        return {
+            "size": k,
+            "_source": ["text", "metadata"],
+            "query": {
+                "multi_match": {
+                    "query": query,
+                    "fields": ["text^3", "metadata.title"],
+                    "type": "best_fields"
                 }
-            })
+            }
+        }
 
-            # 결과 결합
-            combined_results = {}
+    def _combine_hits(self, vector_response, keyword_response, vector_weight):
+        """ 한 인덱스의 벡터/키워드 검색 결과를 가중합으로 결합 """
+        combined_results = {}
+
+        # 벡터 검색 결과 처리
+        for hit in vector_response['hits']['hits']:
+            doc_id = (hit.get('_index'), hit['_id'])
+            score = hit['_score'] * vector_weight
+            combined_results[doc_id] = {
+                'hit': hit,
+                'score': score
+            }
 
-            # 벡터 검색 결과 처리
-            for hit in vector_response['hits']['hits']:
-                doc_id = hit['_id']
-                score = hit['_score'] * vector_weight
+        # 키워드 검색 결과 처리
+        for hit in keyword_response['hits']['hits']:
+            doc_id = (hit.get('_index'), hit['_id'])
+            score = hit['_score'] * (1 - vector_weight)
+            if doc_id in combined_results:
+                combined_results[doc_id]['score'] += score
+            else:
                 combined_results[doc_id] = {
                     'hit': hit,
                     'score': score
                 }
 
-            # 키워드 검색 결과 처리
-            for hit in keyword_response['hits']['hits']:
-                doc_id = hit['_id']
-                score = hit['_score'] * (1 - vector_weight)
-                if doc_id in combined_results:
-                    combined_results[doc_id]['score'] += score
-                else:
-                    combined_results[doc_id] = {
-                        'hit': hit,
-                        'score': score
-                    }
+        return list(combined_results.values())
+
+    def _normalize_scores(self, results, weight):
+        """ 인덱스마다 점수 분포가 다르므로 min-max로 0~1 정규화 후 인덱스 가중치 적용 """
+        if not results:
+            return results
+
+        scores = [result['score'] for result in results]
+        low, high = min(scores), max(scores)
+        for result in results:
+            normalized = (result['score'] - low) / (high - low) if high > low else 1.0
+            result['score'] = normalized * weight
+        return results
+
+    def _to_documents(self, results, k):
+        """ 점수순 정렬 후 (title, created) 기준으로 중복 제거하여 Document 리스트 생성 """
+        sorted_results = sorted(results, key=lambda x: x['score'], reverse=True)[:k]
+
+        unique_documents = {}
+        documents = []
+        for result in sorted_results:
+            doc = self.create_document_from_hit(result['hit'])
+            title = doc.metadata.get("title", "")
+            created = doc.metadata.get("created", "")
+            key = (title, created)
+
+            if key not in unique_documents:  # 중복 체크
+                unique_documents[key] = doc
+                doc.metadata['final_score'] = result['score']  # 최종 점수 추가
+                documents.append(doc)
+
+        return documents
+
+    def _search_index(self, index, queries, vectors, k, vector_weight, timeout):
+        """
+        하나의 인덱스에 대해 주어진 질의를 msearch 한 번으로 검색.
+        :return: 질의 순서와 동일한, 정규화된 결과 리스트의 리스트
+        """
+        index_k = index["k"] or k
+        searches = []
+        for query, vector in zip(queries, vectors):
+            searches.append({"index": index["name"]})
+            searches.append(self._vector_query_body(vector, index_k))
+            searches.append({"index": index["name"]})
+            searches.append(self._keyword_query_body(query, index_k))
+
+        responses = self.es_client.options(request_timeout=timeout).msearch(body=searches)["responses"]
 
-            # 결과 정렬 및 Document 객체 생성
-            sorted_results = sorted(combined_results.items(),
-                                    key=lambda x: x[1]['score'],
-                                    reverse=True)[:k]
+        results = []
+        for i in range(len(queries)):
+            vector_response = responses[2 * i]
+            keyword_response = responses[2 * i + 1]
+            if "error" in vector_response or "error" in keyword_response:
+                error = vector_response.get("error") or keyword_response.get("error")
+                logger.warning(f"Search failed on index {index['name']} for query {queries[i]!r}: {error}")
+                results.append([])
+                continue
+            combined = self._combine_hits(vector_response, keyword_response, vector_weight)
+            results.append(self._normalize_scores(combined, index["weight"]))
 
-            unique_documents = {}
-            documents = []
-            for _, result in sorted_results:
-                doc = self.create_document_from_hit(result['hit'])
-                title = doc.metadata.get("title", "")
-                created = doc.metadata.get("created", "")
-                key = (title, created)
+        return results
 
-                if key not in unique_documents:  # 중복 체크
-                    unique_documents[key] = doc
-                    doc.metadata['final_score'] = result['score']  # 최종 점수 추가
-                    documents.append(doc)
+    def _fan_out(self, queries, vectors, k, vector_weight):
+        """
+        설정된 모든 인덱스를 동시에 검색하고 결과를 병합.
+        제한 시간(질의당 search_timeout × 질의 수)을 넘기거나 실패한 인덱스는 로그만 남기고 제외한다.
+        """
+        timeout = self.search_timeout * len(queries)
+
+        # 호출 측 context(trace id 등)를 작업 스레드로 복사
+        futures = {
+            self.executor.submit(
+                contextvars.copy_context().run, self._search_index, index, queries, vectors, k, vector_weight, timeout
+            ): index
+            for index in self.indices
+        }
+        done, not_done = wait(futures, timeout=timeout)
+
+        for future in not_done:
+            future.cancel()
+            logger.warning(f"Search on index {futures[future]['name']} timed out after {timeout}s")
+
+        merged = [[] for _ in queries]
+        succeeded = 0
+        for future in done:
+            try:
+                per_query = future.result()
+            except Exception as e:
+                logger.warning(f"Search on index {futures[future]['name']} failed: {str(e)}")
+                continue
+            succeeded += 1
+            for i, results in enumerate(per_query):
+                merged[i].extend(results)
+
+        if not succeeded:
+            raise RuntimeError("No Elasticsearch index returned results in time")
 
+        return [self._to_documents(results, k) for results in merged]
+
+    def hybrid_search(self, query, k=10, vector_weight=0.5):
+        start = time.perf_counter()
+        try:
+            vector_query = self.embedding_model.embed_query(query)
+            documents = self._fan_out([query], [vector_query], k, vector_weight)[0]
+            logger.info("Hybrid search finished.", extra={
+                "indices": [index["name"] for index in self.indices],
+                "documents": len(documents),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
             return documents
 
         except Exception as e:
             logger.error(f"Error in hybrid search: {str(e)}")
             raise
 
+    def hybrid_search_batch(self, queries, k=10, vector_weight=0.5):
+        """
+        여러 질의를 한 번에 검색.
+        임베딩은 embed_documents 한 번으로 처리하고, 검색은 batch_size 단위로 나누어
+        묶음마다 인덱스별 msearch 한 번씩 수행한다. 제한 시간은 묶음의 질의 수에 비례한다.
+        :param queries: 검색 질의 리스트
+        :return: 질의 순서와 동일한 Document 리스트의 리스트 (모든 인덱스가 실패한 묶음의 질의는 None)
+        """
+        if not queries:
+            return []
+
+        start = time.perf_counter()
+        try:
+            queries = list(queries)
+            vectors = self.embedding_model.embed_documents(queries)
+
+            results = []
+            for offset in range(0, len(queries), self.batch_size):
+                chunk = queries[offset:offset + self.batch_size]
+                try:
+                    results.extend(self._fan_out(chunk, vectors[offset:offset + self.batch_size], k, vector_weight))
+                except Exception as e:
+                    # 한 묶음의 실패가 전체 배치를 실패시키지 않도록 해당 질의만 None 처리
+                    logger.error(f"Batch hybrid search failed for queries {offset}-{offset + len(chunk) - 1}: {str(e)}")
+                    results.extend([None] * len(chunk))
+
+            logger.info("Batch hybrid search finished.", extra={
+                "indices": [index["name"] for index in self.indices],
+                "queries": len(queries),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
+            return results
+
+        except Exception as e:
+            logger.error(f"Error in batch hybrid search: {str(e)}")
+            raise
+
     def similarity_search(self, query, k=10):
         """ 기존 similarity_search를 hybrid_search로 대체 """
         return self.hybrid_search(query, k=k)
\ No newline at end of file
@@ -3,6 +3,9 @@ from langchain.schema import HumanMessage, SystemMessage
 from langchain.memory import ConversationBufferMemory
 from typing import Generator, List
 
+# 자동 prompt caching을 지원하는 모델 (prefix 1024 토큰 이상일 때 적용)
+PROMPT_CACHING_MODELS = ("gpt-4o", "gpt-4.1", "o1", "o3", "o4")
+
 class ChatGPT:
 
     def __init__(self, api_key: str, model: str = "gpt-4"):
@@ -13,6 +16,7 @@ class ChatGPT:
             streaming=True
         )
         self.memory = ConversationBufferMemory()
+        self.supports_prompt_caching = model.startswith(PROMPT_CACHING_MODELS)
 
     def send_request(self, prompt: str) -> str:
         try:
@@ -3,6 +3,9 @@ from langchain.schema import HumanMessage, SystemMessage
 from langchain.memory import ConversationBufferMemory
 from typing import Generator
 
+# implicit caching을 지원하는 모델 (모델별 최소 prefix 길이 이상일 때 적용, 1024 토큰~)
+PROMPT_CACHING_MODELS = ("gemini-2.5",)
+
 class Gemini:
     def __init__(self, api_key: str, model: str = "gemini-pro"):
         self.chat = ChatGoogleGenerativeAI(
@@ -12,6 +15,7 @@ class Gemini:
             streaming=True
         )
         self.memory = ConversationBufferMemory()
+        self.supports_prompt_caching = model.startswith(PROMPT_CACHING_MODELS)
 
     def send_request(self, prompt: str) -> str:
         try:
@@ -1,4 +1,5 @@
-from .prompt import Prompt
+from .prompt import Prompt, PromptTemplate
 
 __all__ = [
-    "Prompt"]
+    "Prompt",
+    "PromptTemplate"]
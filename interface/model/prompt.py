@@ -1,8 +1,186 @@
+import re
+import textwrap
+from functools import cached_property
+from string import Formatter
+
+# tiktoken 인코딩은 첫 사용 시 로드 (캐시가 없으면 BPE 파일을 내려받으므로 import 시점에는 로드하지 않음)
+_ENCODING = None
+_ENCODING_LOADED = False
+
+_HANGUL = re.compile(r"[\u1100-\u11ff\u3130-\u318f\uac00-\ud7a3]")
+_WHITESPACE = re.compile(r"\s+")
+
+# OpenAI 자동 프롬프트 캐싱과 Gemini implicit caching이 적용되는 최소 공통 prefix 길이(토큰)
+CACHE_MIN_PREFIX_TOKENS = 1024
+
+
+def _get_encoding():
+    global _ENCODING, _ENCODING_LOADED
+    if not _ENCODING_LOADED:
+        _ENCODING_LOADED = True
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # tiktoken 미설치 또는 인코딩 로드 실패 시 글자 수로 추정
+            _ENCODING = None
+    return _ENCODING
+
+
+def estimate_tokens(text: str) -> int:
+    """Character-based estimate: about one token per Hangul character, four characters per token otherwise"""
+    hangul = len(_HANGUL.findall(text))
+    others = len(_WHITESPACE.sub("", text)) - hangul
+    return hangul + (others + 3) // 4
+
+
+def count_tokens(text: str) -> int:
+    """Approximate the provider-side token count of `text`"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return estimate_tokens(text)
+
+
+def normalize_whitespace(text: str) -> str:
+    """Dedent, strip trailing spaces and collapse runs of blank lines"""
+    lines = [line.rstrip() for line in textwrap.dedent(text).strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+class PromptTemplate:
+    """
+    Template split into a static prefix and a dynamic suffix.
+    The prefix holds the instructions and never changes between requests, so it is
+    sent first and can be reused by provider-side prompt caching; only the suffix is
+    filled in per request. Both parts are normalized and parsed once at import time.
+    Caching only applies when the prefix reaches CACHE_MIN_PREFIX_TOKENS and the
+    model supports it (see `prefix_cacheable` and the LLM `supports_prompt_caching`).
+    """
+
+    def __init__(self, static: str, dynamic: str):
+        self.static_prefix = normalize_whitespace(static) + "\n\n"
+        self._segments = list(Formatter().parse(normalize_whitespace(dynamic)))
+
+    @cached_property
+    def static_tokens(self) -> int:
+        return count_tokens(self.static_prefix)
+
+    @property
+    def prefix_cacheable(self) -> bool:
+        return self.static_tokens >= CACHE_MIN_PREFIX_TOKENS
+
+    def render_dynamic(self, **values) -> str:
+        parts = []
+        for literal, field, _, _ in self._segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(values[field]))
+        return "".join(parts)
+
+    def render(self, **values) -> str:
+        return self.static_prefix + self.render_dynamic(**values)
+
+    def token_split(self, dynamic: str) -> dict:
+        """Static vs dynamic token counts; only the rendered dynamic part is tokenized"""
+        return {
+            "static": self.static_tokens,
+            "dynamic": count_tokens(dynamic),
+            "prefix_cacheable": self.prefix_cacheable,
+        }
+
+
+RAG_TEMPLATE = PromptTemplate(
+    static="""
+        당신은 제공된 문서만을 사용하여 질문에 답변하는 지능형 어시스턴트입니다.
+
+        **지침:**
+        1. 사용자의 질문 언어와 관계없이, **모든 답변은 한국어로만 작성**합니다.
+        2. 질문과 관련 있는 문서만 사용하여 답변을 생성합니다.
+           - 관련 없는 문서는 **완전히 무시**합니다.
+        3. 제공된 문서에서 **명확한 답을 찾을 수 있는 경우**, 이를 기반으로 답변합니다.
+        4. 만약 요청한 정보가 문서에서 **명확히 제공되지 않은 경우**, 다음과 같이 응답합니다:
+           - **"요청한 정보는 제공된 문서에서 찾을 수 없습니다."**
+        5. 질문이 제공된 문서와 **전혀 관련이 없을 경우**, 다음과 같이 응답합니다:
+           - **"제공된 문서를 기반으로만 답변할 수 있습니다."**
+        6. **외부 지식이나 추론을 하지 않고**, 오직 문서에 포함된 정보만 사용합니다.
+        7. 명확하고 구조적인 답변을 제공합니다.
+        8. 사용자에게는 답변만 제공하도록 합니다
+        9. 관련 문서에서 정보를 추출하여 **한국어로 구조적인 답변을 작성**하고, 문서의 메타데이터 및 링크 또한 정리하여 포함합니다. 링크 주소는 가공하지 않고 있는 그대로 출력합니다.
+
+        ---
+    """,
+    dynamic="""
+        ### **관련 문서:**
+        (제공된 문서  중 관련 있는 문서만 필터링)
+        {documents}
+
+        ### **사용자의 질문:**
+        {user_question}
+
+        ### **답변:**
+    """,
+)
+
+QUESTION_TEMPLATE = PromptTemplate(
+    static="""
+        당신은 정보 검색을 위한 검색 질의를 최적화하는 전문가입니다. 사용자의 질문을 보다 효과적인 검색 질의로 변환하세요.
+
+        ### 가이드라인:
+        1. **질문을 진술형 문장으로 변환** (예: "X의 위험 요소는?" → "X의 위험 요소").
+        2. **불필요한 단어 제거**, 포함:
+           - **일반적인 검색 요청:** "문서를 찾아줘", "검색해 줘", "알려줘", "보여줘", "관련 정보를 찾아줘", "관련된 정보를 찾아줘"
+           - **정중한 표현:** "혹시", "부탁해", "궁금합니다"
+           - **기간에 대한 표현:** "3개월", "오늘", "지난달"
+           - **문서 작성에 대한 표현:** "발생한", "작성된", "쓴"
+           - **문서 소스에 대한 단어:** "confluence", "컨플루언스", "jira", "지라", "slack", "슬랙"
+        3. **핵심 개념을 우선하며 맥락을 유지**
+        4. **전문 용어나 도메인 관련 키워드는 유지**
+        5. **추가적인 설명 없이 최적화된 검색 질의만 출력**
+
+        ### 예시:
+
+        #### 예시 1 (한국어)
+        **입력:**
+        *"사이버 보안 관련 문서를 찾아줘"*
+        **출력:**
+        *"사이버 보안"*
+
+        #### 예시 2 (영어)
+        **입력:**
+        *"Could you find documents about quantum computing?"*
+        **출력:**
+        *"quantum computing"*
+    """,
+    dynamic="""
+        ### 변환할 입력:
+        **입력:**
+        "{user_question}"
+        **출력:**
+    """,
+)
+
+FINAL_TEMPLATE = PromptTemplate(
+    static="""
+        아래는 하나의 질문에 대하여 문서 묶음별로 개별적으로 생성된 응답들입니다.
+        이 정보를 종합하고 질문과 메타데이터를 다시 명확하게 판단하여 최종 답변을 생성해 주세요. 링크를 포함해야 합니다.
+    """,
+    dynamic="""
+        ### 개별 응답:
+        {partial_answers}
+
+        ### 질문:
+        {user_question}
+    """,
+)
+
+
 class Prompt:
 
     def __init__(self, user_question: str):
         self.user_question = user_question
         self.documents = []
+        # 마지막으로 생성한 프롬프트의 템플릿과 dynamic 부분
+        self._last_render = None
 
     def add_document(self, document: str, metadata:dict):
         # if len(self.documents) < self.max_documents:
@@ -10,87 +188,39 @@ class Prompt:
         # else:
             # raise ValueError(f"Cannot add more than {self.max_documents} documents.")
 
-    def generate_prompt_rag(self) -> str:
-        prompt_template = """
-            당신은 제공된 문서만을 사용하여 질문에 답변하는 지능형 어시스턴트입니다.
-            
-            **지침:**  
-            1. 사용자의 질문 언어와 관계없이, **모든 답변은 한국어로만 작성**합니다.  
-            2. 질문과 관련 있는 문서만 사용하여 답변을 생성합니다.  
-               - 관련 없는 문서는 **완전히 무시**합니다.  
-            3. 제공된 문서에서 **명확한 답을 찾을 수 있는 경우**, 이를 기반으로 답변합니다.  
-            4. 만약 요청한 정보가 문서에서 **명확히 제공되지 않은 경우**, 다음과 같이 응답합니다:  
-               - **"요청한 정보는 제공된 문서에서 찾을 수 없습니다."**  
-            5. 질문이 제공된 문서와 **전혀 관련이 없을 경우**, 다음과 같이 응답합니다:  
-               - **"제공된 문서를 기반으로만 답변할 수 있습니다."**  
-            6. **외부 지식이나 추론을 하지 않고**, 오직 문서에 포함된 정보만 사용합니다.  
-            7. 명확하고 구조적인 답변을 제공합니다.
-            8. 사용자에게는 답변만 제공하도록 합니다
-            
-            ---
-            
-            ### **사용자의 질문:**  
-            {user_question}
-            
-            ### **관련 문서:**  
-            (제공된 문서  중 관련 있는 문서만 필터링)
-            {documents}
-            
-            ### **답변:**  
-            (관련 문서에서 정보를 추출하여 **한국어로 구조적인 답변을 작성**, 문서의 메타데이터 및 링크 또한 정리하여 포함할 것, 링크 주소는 가공하지 않고 있는 그대로 출력할것)
-                            
-
-"""
+    def _render(self, template: PromptTemplate, **values) -> str:
+        dynamic = template.render_dynamic(**values)
+        self._last_render = (template, dynamic)
+        return template.static_prefix + dynamic
+
+    def token_split(self) -> dict:
+        """Static/dynamic token counts of the last generated prompt"""
+        if self._last_render is None:
+            return {"static": 0, "dynamic": 0, "prefix_cacheable": False}
+        template, dynamic = self._last_render
+        return template.token_split(dynamic)
 
+    def generate_prompt_rag(self) -> str:
         documents_section = "\n".join(
             [f"Document {i+1}: Metadata: {metadata} Content:\"\"\" \n{doc}\n \"\"\"" for i, (doc, metadata) in enumerate(self.documents)]
         )
-        answer =  prompt_template.format(
+        return self._render(
+            RAG_TEMPLATE,
             user_question=self.user_question,
             documents=documents_section or "No documents provided."
         )
 
-        return answer
-
     def generate_prompt_question(self) -> str:
-        prompt_template = """
-            당신은 정보 검색을 위한 검색 질의를 최적화하는 전문가입니다. 사용자의 질문을 보다 효과적인 검색 질의로 변환하세요.
-            
-            ### 가이드라인:
-            1. **질문을 진술형 문장으로 변환** (예: "X의 위험 요소는?" → "X의 위험 요소").
-            2. **불필요한 단어 제거**, 포함:
-               - **일반적인 검색 요청:** "문서를 찾아줘", "검색해 줘", "알려줘", "보여줘", "관련 정보를 찾아줘", "관련된 정보를 찾아줘"
-               - **정중한 표현:** "혹시", "부탁해", "궁금합니다"
-               - **기간에 대한 표현:** "3개월", "오늘", "지난달"
-               - **문서 작성에 대한 표현:** "발생한", "작성된", "쓴"
-               - **문서 소스에 대한 단어:** "confluence", "컨플루언스", "jira", "지라", "slack", "슬랙"
-            3. **핵심 개념을 우선하며 맥락을 유지**
-            4. **전문 용어나 도메인 관련 키워드는 유지**
-            5. **추가적인 설명 없이 최적화된 검색 질의만 출력**
-            
-            ### 예시:
-            
-            #### 예시 1 (한국어)
-            **입력:**  
-            *"사이버 보안 관련 문서를 찾아줘"*  
-            **출력:**  
-            *"사이버 보안"*
-            
-            #### 예시 2 (영어)
-            **입력:**  
-            *"Could you find documents about quantum computing?"*  
-            **출력:**  
-            *"quantum computing"*
-            
-            ### 변환할 입력:
-            **입력:**  
-            "{user_question}"  
-            **출력:**
-            """
-
-
-        self.user_question = prompt_template.format(
+        self.user_question = self._render(
+            QUESTION_TEMPLATE,
             user_question=self.user_question,
         )
 
-        return self.user_question
\ No newline at end of file
+        return self.user_question
+
+    def generate_prompt_final(self, partial_answers: list) -> str:
+        return self._render(
+            FINAL_TEMPLATE,
+            user_question=self.user_question,
+            partial_answers="\n\n".join(partial_answers)
+        )
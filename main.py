@@ -3,14 +3,12 @@ from dotenv import load_dotenv
 import uvicorn
 from controller.listener import app as slack_app
 from controller.generator import Generator
+from controller.log import setup_logging
 
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queue-backed: JSON to app.log, plain text to stderr)
+setup_logging("app.log")
 logger = logging.getLogger(__name__)
 
 def load_env() -> dict:
@@ -32,6 +30,8 @@ def load_env() -> dict:
             "ELASTIC_USER": os.getenv("ELASTIC_USER"),
             "ELASTIC_PASSWORD": os.getenv("ELASTIC_PASSWORD"),
             "ELASTIC_PORT": os.getenv("ELASTIC_PORT"),
+            "ELASTIC_INDICES": os.getenv("ELASTIC_INDICES", ""),
+            "ELASTIC_SEARCH_TIMEOUT": os.getenv("ELASTIC_SEARCH_TIMEOUT", "5"),
             
             # Slack Settings
             "SLACK_API_TOKEN": os.getenv("SLACK_API_TOKEN"),
@@ -60,6 +60,10 @@ def run_server():
             port=8000,
             reload=True,
             log_level="info",
+            # 로깅은 controller.log에서 설정 (uvicorn 기본 설정이 큐 핸들러를 덮어쓰지 않도록)
+            log_config=None,
+            # 접근 로그는 listener의 log_requests 미들웨어에서 샘플링하여 기록
+            access_log=False,
             workers=1
         )
     except Exception as e:
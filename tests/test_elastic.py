@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+pytest.importorskip("langchain_community")
+pytest.importorskip("elasticsearch")
+
+from interface.db.elastic import Elastic
+
+SEARCH_LATENCY = 0.005  # 검색 한 건당 소요 시간(초)
+
+
+class StubEmbedding:
+    def embed_query(self, query):
+        return [0.1, 0.2]
+
+    def embed_documents(self, queries):
+        return [[0.1, 0.2] for _ in queries]
+
+
+class StubClient:
+    """msearch 요청의 검색 건수에 비례하여 지연되는 Elasticsearch 대역"""
+
+    def __init__(self, slow_indices=(), failing_indices=()):
+        self.slow_indices = set(slow_indices)
+        self.failing_indices = set(failing_indices)
+        self.request_timeouts = []
+
+    def options(self, request_timeout=None):
+        self.request_timeouts.append(request_timeout)
+        return self
+
+    def msearch(self, body):
+        index = body[0]["index"]
+        if index in self.failing_indices:
+            raise ConnectionError(f"{index} is down")
+        searches = len(body) // 2
+        time.sleep(SEARCH_LATENCY * searches * (100 if index in self.slow_indices else 1))
+
+        responses = []
+        for i in range(searches):
+            query_no = i // 2
+            responses.append({"hits": {"hits": [{
+                "_index": index,
+                "_id": f"{query_no}",
+                "_score": 1.0,
+                "_source": {"text": f"{index} {query_no}", "metadata": {"title": f"{index}-{query_no}"}},
+            }]}})
+        return {"responses": responses}
+
+
+def make_elastic(client, indices=None, search_timeout=0.05, batch_size=10):
+    elastic = Elastic(
+        host="http://localhost:9200",
+        port=9200,
+        embedding_model=StubEmbedding(),
+        index_name="aitrics",
+        indices=indices,
+        search_timeout=search_timeout,
+        batch_size=batch_size,
+    )
+    elastic.es_client = client
+    return elastic
+
+
+def test_batch_larger_than_one_timeout_window():
+    # 200개 질의를 한 번에 보내면 400건 × 5ms = 2초로 질의당 제한 시간(0.05초)을 크게 넘지만
+    # 묶음 단위로 나누고 제한 시간을 묶음 크기에 비례시키므로 모두 성공해야 한다
+    client = StubClient()
+    elastic = make_elastic(client)
+    queries = [f"question {i}" for i in range(200)]
+
+    results = elastic.hybrid_search_batch(queries, k=5)
+
+    assert len(results) == len(queries)
+    assert all(documents for documents in results)
+    assert max(client.request_timeouts) == pytest.approx(0.05 * 10)
+
+
+def test_batch_drops_slow_and_failing_indices():
+    client = StubClient(slow_indices={"slack"}, failing_indices={"jira"})
+    elastic = make_elastic(client, indices=[
+        {"name": "confluence", "k": 5, "weight": 1.0},
+        {"name": "jira", "k": 5, "weight": 0.8},
+        {"name": "slack", "k": 5, "weight": 0.5},
+    ])
+
+    results = elastic.hybrid_search_batch(["a", "b", "c"], k=5)
+
+    assert [len(documents) for documents in results] == [1, 1, 1]
+    assert all(documents[0].metadata["index"] == "confluence" for documents in results)
+
+
+def test_batch_marks_queries_none_when_every_index_fails():
+    elastic = make_elastic(StubClient(failing_indices={"aitrics"}), batch_size=2)
+
+    assert elastic.hybrid_search_batch(["a", "b", "c"], k=5) == [None, None, None]
+
+
+def test_hybrid_search_raises_when_every_index_fails():
+    elastic = make_elastic(StubClient(failing_indices={"aitrics"}))
+
+    with pytest.raises(RuntimeError):
+        elastic.hybrid_search("a", k=5)
@@ -0,0 +1,99 @@
+import pytest
+
+pytest.importorskip("langchain")
+pytest.importorskip("langchain_openai")
+pytest.importorskip("langchain_google_genai")
+pytest.importorskip("langchain_community")
+pytest.importorskip("elasticsearch")
+
+from langchain.schema import Document
+
+from controller.generator import Generator
+
+ROW_KEYS = {"question", "trace_id", "answer", "error", "timings"}
+TIMING_KEYS = {"refine", "retrieval", "generation", "total"}
+
+
+class StubLLM:
+    """ChatGPT 래퍼처럼 실패 시 예외 대신 오류 문자열을 반환하는 LLM 대역"""
+
+    def __init__(self, failing_refine=()):
+        self.failing_refine = set(failing_refine)
+
+    def send_request(self, prompt):
+        if "변환할 입력" in prompt:
+            if any(f'"{question}"' in prompt for question in self.failing_refine):
+                return "Error communicating with ChatGPT: rate limit exceeded"
+            return "refined " + prompt.rsplit('"', 2)[-2]
+        return "answer"
+
+
+class StubElastic:
+    def __init__(self, failing_queries=()):
+        self.failing_queries = set(failing_queries)
+        self.queries = None
+
+    def hybrid_search_batch(self, queries, k=10):
+        self.queries = list(queries)
+        return [
+            None if query in self.failing_queries
+            else [Document(page_content=f"doc for {query}", metadata={"title": query})]
+            for query in queries
+        ]
+
+
+def make_generator(llm, elastic):
+    generator = Generator.__new__(Generator)
+    generator.llm = llm
+    generator.elastic = elastic
+    generator.max_token_limit = 4000
+    return generator
+
+
+def test_get_answers_dedupes_and_reports_failures():
+    elastic = StubElastic(failing_queries={"refined c"})
+    generator = make_generator(StubLLM(failing_refine={"b"}), elastic)
+    streamed = []
+
+    results = generator.get_answers(
+        ["a", " a ", "b", "", "c", "a"], requests_per_minute=0, on_result=streamed.append
+    )
+
+    # 중복/빈 질문 제거, 입력 순서 유지
+    assert [row["question"] for row in results] == ["a", "b", "c"]
+
+    # 정제 실패 시 오류 문자열이 아닌 원래 질문으로 검색
+    assert elastic.queries == ["refined a", "b", "refined c"]
+
+    by_question = {row["question"]: row for row in results}
+    assert by_question["a"]["error"] is None
+    assert by_question["a"]["answer"] == "answer"
+    assert "Question refinement failed" in by_question["b"]["error"]
+    assert "rate limit exceeded" in by_question["b"]["error"]
+    assert by_question["b"]["answer"] == "answer"
+    assert by_question["c"]["error"] == "Document retrieval failed"
+    assert by_question["c"]["answer"].startswith("Error generating answer")
+
+    # 성공/실패와 관계없이 동일한 스키마
+    for row in results:
+        assert set(row) == ROW_KEYS
+        assert set(row["timings"]) == TIMING_KEYS
+
+    # 모든 행이 완료 즉시 한 번씩 전달됨
+    assert sorted(row["question"] for row in streamed) == ["a", "b", "c"]
+
+
+def test_get_answers_records_generation_failure():
+    class FailingAnswerLLM(StubLLM):
+        def send_request(self, prompt):
+            if "변환할 입력" in prompt:
+                return super().send_request(prompt)
+            return "Error communicating with ChatGPT: timeout"
+
+    generator = make_generator(FailingAnswerLLM(), StubElastic())
+
+    [row] = generator.get_answers(["a"], requests_per_minute=0)
+
+    assert "timeout" in row["error"]
+    assert row["answer"].startswith("Error generating answer")
+    assert set(row["timings"]) == TIMING_KEYS
@@ -0,0 +1,84 @@
+from interface.model.prompt import (
+    FINAL_TEMPLATE,
+    QUESTION_TEMPLATE,
+    RAG_TEMPLATE,
+    Prompt,
+    PromptTemplate,
+    estimate_tokens,
+)
+
+
+def make_rag_prompt(question, documents):
+    prompt = Prompt(user_question=question)
+    for text, metadata in documents:
+        prompt.add_document(text, metadata)
+    return prompt, prompt.generate_prompt_rag()
+
+
+def test_static_prefix_is_identical_across_renders():
+    _, first = make_rag_prompt("휴가 신청 방법", [("연차는 HR 시스템에서 신청", {"title": "휴가"})])
+    _, second = make_rag_prompt("배포 절차?", [("main 브랜치 머지 후 배포", {"title": "배포"})])
+
+    prefix = RAG_TEMPLATE.static_prefix
+    assert first.startswith(prefix)
+    assert second.startswith(prefix)
+    assert first.encode()[:len(prefix.encode())] == second.encode()[:len(prefix.encode())]
+
+
+def test_documents_and_question_follow_static_prefix():
+    _, prompt = make_rag_prompt("휴가 신청 방법", [("연차는 HR 시스템에서 신청", {"title": "휴가"})])
+
+    prefix_end = len(RAG_TEMPLATE.static_prefix)
+    document_at = prompt.index("연차는 HR 시스템에서 신청")
+    question_at = prompt.index("휴가 신청 방법")
+    assert prefix_end <= document_at < question_at
+
+    for template, prompt, variable in [
+        (QUESTION_TEMPLATE, Prompt("사이버 보안 문서 찾아줘").generate_prompt_question(), "사이버 보안 문서 찾아줘"),
+        (FINAL_TEMPLATE, Prompt("배포 절차?").generate_prompt_final(["부분 응답"]), "부분 응답"),
+    ]:
+        assert prompt.startswith(template.static_prefix)
+        assert prompt.index(variable) >= len(template.static_prefix)
+
+
+def test_braces_in_values_pass_through_untouched():
+    text = 'config = {"retries": {}} and f"{name}" {0} {{x}}'
+    _, prompt = make_rag_prompt("설정 {질문}", [(text, {"title": "{title}"})])
+
+    assert text in prompt
+    assert "설정 {질문}" in prompt
+    assert "{'title': '{title}'}" in prompt
+
+
+def test_template_normalizes_whitespace_once():
+    template = PromptTemplate(
+        static="""
+            지침
+
+
+
+            끝
+        """,
+        dynamic="""
+            질문: {question}
+        """,
+    )
+
+    assert template.static_prefix == "지침\n\n끝\n\n"
+    assert template.render(question="q") == "지침\n\n끝\n\n질문: q"
+
+
+def test_token_split_counts_only_dynamic_part():
+    prompt = Prompt("질문")
+    prompt.generate_prompt_question()
+
+    split = prompt.token_split()
+    assert split["static"] == QUESTION_TEMPLATE.static_tokens
+    assert 0 < split["dynamic"] < split["static"]
+    assert split["prefix_cacheable"] == (split["static"] >= 1024)
+
+
+def test_estimate_tokens_counts_hangul_per_character():
+    assert estimate_tokens("안녕하세요") == 5
+    assert estimate_tokens("abcd efgh") == 2
+    assert estimate_tokens("문서 abcd") == 3